@@ -4,10 +4,25 @@ Codebase Indexer - A tool for creating LLM-friendly codebase indexes
 """
 
 import fnmatch
-import subprocess
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import threading
 from pathlib import Path
-from typing import List, Set, Optional
+from typing import Dict, Iterable, Iterator, List, Set, Optional, Tuple
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
+
+try:
+    import pathspec
+except ImportError:
+    # Optional: fall back to plain glob matching of .gitignore patterns
+    pathspec = None
 
 # Language detection mapping
 LANGUAGE_MAP = {
@@ -33,6 +48,7 @@ LANGUAGE_MAP = {
     # XML
     ".xml": "xml",
     ".xhtml": "xml",
+    ".svg": "xml",
     # Shell
     ".sh": "bash",
     ".bash": "bash",
@@ -50,6 +66,10 @@ LANGUAGE_MAP = {
     ".txt": "text",
     # SQL
     ".sql": "sql",
+    # Data and translations
+    ".csv": "csv",
+    ".po": "po",
+    ".pot": "po",
     # C/C++
     ".c": "c",
     ".cpp": "cpp",
@@ -75,189 +95,570 @@ LANGUAGE_MAP = {
     ".kts": "kotlin",
 }
 
+# Sort key for os.DirEntry lists
+_BY_NAME = attrgetter("name")
+
+# Only files with a known extension are embedded unless asked otherwise
+_INTERESTING_SUFFIXES = frozenset(LANGUAGE_MAP)
+
+# Persistent cache of file contents, keyed by path, size and mtime. One
+# database per indexed root, kept in the user cache directory.
+CACHE_DIR_NAME = "codebase_indexer"
+
+# New cache rows are written in short transactions once either limit is hit
+CACHE_FLUSH_ROWS = 256
+CACHE_FLUSH_SIZE = 8 << 20
+
 # Common directories to exclude
-DEFAULT_EXCLUDES = {
-    ".git",
-    ".svn",
-    ".hg",
-    "node_modules",
-    "__pycache__",
-    "dist",
-    "build",
-    "target",
-    "venv",
-    ".env",
-    ".idea",
-    ".vscode",
-    ".DS_Store",
-    "*.pyc",
-    "*.pyo",
-    "*.pyd",
-    "*.so",
-    "*.dylib",
-    "*.dll",
-    "*.class",
-    "*.o",
-    "*.a",
-    "*.lib",
-    "*.exe",
-    "*.dll",
-    "*.so",
-    "*.dylib",
-    "*.log",
-    "*.tmp",
-    "*.temp",
-    "*.swp",
-    "*.swo",
-    "*.bak",
-    "*.backup",
-    "*.orig",
-    "*.rej",
-    "*.patch",
-    "*.diff",
-    "*.zip",
-    "*.tar",
-    "*.gz",
-    "*.rar",
-    "*.7z",
-    "*.bz2",
-    "*.xz",
-    "*.tgz",
-    "*.tar.gz",
-    "*.tar.bz2",
-    "*.tar.xz",
-}
+DEFAULT_EXCLUDES = frozenset(
+    {
+        ".git",
+        ".svn",
+        ".hg",
+        "node_modules",
+        "__pycache__",
+        "dist",
+        "build",
+        "target",
+        "venv",
+        ".env",
+        ".idea",
+        ".vscode",
+        ".DS_Store",
+        "*.pyc",
+        "*.pyo",
+        "*.pyd",
+        "*.so",
+        "*.dylib",
+        "*.dll",
+        "*.class",
+        "*.o",
+        "*.a",
+        "*.lib",
+        "*.exe",
+        "*.log",
+        "*.tmp",
+        "*.temp",
+        "*.swp",
+        "*.swo",
+        "*.bak",
+        "*.backup",
+        "*.orig",
+        "*.rej",
+        "*.patch",
+        "*.diff",
+        "*.zip",
+        "*.tar",
+        "*.gz",
+        "*.rar",
+        "*.7z",
+        "*.bz2",
+        "*.xz",
+        "*.tgz",
+        "*.tar.gz",
+        "*.tar.bz2",
+        "*.tar.xz",
+    }
+)
+
+# Output is written through a large buffer so small writes are coalesced
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Indexes whose embedded files total less than this are built in memory
+IN_MEMORY_OUTPUT_LIMIT = 64 << 20
+
+# Closing fence written after each embedded file
+FILE_BLOCK_END = "\n```\n\n"
+
+# Number of threads reading files concurrently
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)
+
+# In-flight reads per thread; bounds memory held by results not yet written
+READ_AHEAD_FACTOR = 4
+
+# Files larger than this (in bytes) are left out of the index by default
+DEFAULT_MAX_FILE_SIZE = 1 << 20
+
+# Binary sniffing: size of the header inspected and tolerated control bytes
+BINARY_SNIFF_SIZE = 8192
+BINARY_THRESHOLD = 0.3
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7F})
+
+
+def _is_glob(pattern: str) -> bool:
+    """Return True if the pattern contains fnmatch wildcards."""
+    return any(c in pattern for c in "*?[")
+
+
+def _suffix(name: str) -> str:
+    """Return the lowercased extension of a file name, like Path.suffix."""
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot > 0 else ""
+
+
+def _looks_binary(head: bytes) -> bool:
+    """Guess whether a file is binary from its first bytes."""
+    if b"\x00" in head:
+        return True
+    if not head:
+        return False
+    control = head.translate(None, _TEXT_BYTES)
+    return len(control) / len(head) > BINARY_THRESHOLD
+
+
+@lru_cache(maxsize=4096)
+def _translate_glob(pattern: str) -> str:
+    """Translate a single fnmatch pattern to a regex, once per pattern."""
+    return fnmatch.translate(pattern)
+
+
+@lru_cache(maxsize=256)
+def _compile_glob_set(patterns: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """Compile a tuple of fnmatch patterns into one alternation regex."""
+    if not patterns:
+        return None
+    return re.compile("|".join(_translate_glob(p) for p in patterns))
+
+
+def _compile_globs(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """Compile fnmatch patterns into one alternation regex, or None if empty."""
+    # Sorted and deduplicated so equal pattern sets share one cached regex
+    return _compile_glob_set(tuple(sorted(set(patterns))))
 
 
 class CodebaseIndexer:
+    _LANG_GET = LANGUAGE_MAP.get
+
     def __init__(
-        self, root_dir: str, output_file: str, excludes: Optional[Set[str]] = None
+        self,
+        root_dir: str,
+        output_file: str,
+        excludes: Optional[Set[str]] = None,
+        max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+        jobs: int = DEFAULT_JOBS,
+        include_unknown: bool = False,
+        use_cache: bool = True,
     ):
         self.root_dir = Path(root_dir).resolve()
         self.output_file = Path(output_file).resolve()
-        self.excludes = set(DEFAULT_EXCLUDES)
-        if excludes:
-            self.excludes.update(excludes)
-
-        # Load .gitignore patterns if exists
-        self.gitignore_patterns = self._load_gitignore()
-
-    def _load_gitignore(self) -> List[str]:
-        """Load patterns from .gitignore file if it exists."""
+        self.max_file_size = max_file_size
+        self.jobs = jobs
+        self.include_unknown = include_unknown
+        self.use_cache = use_cache
+        self._cache: Optional[sqlite3.Connection] = None
+        self._cache_lock = threading.Lock()
+        self._cache_pending: List[Tuple[str, int, int, Optional[str]]] = []
+        self._cache_pending_size = 0
+        self.excludes = DEFAULT_EXCLUDES | frozenset(excludes or ())
+
+        # Precompile excludes: plain names go in a set, globs in a single regex
+        # Patterns containing "/" are matched against the path relative to root
+        name_patterns = [p for p in self.excludes if "/" not in p]
+        self._exclude_literals = frozenset(
+            p for p in name_patterns if not _is_glob(p)
+        )
+        self._exclude_glob_re = _compile_globs(
+            p for p in name_patterns if p not in self._exclude_literals
+        )
+        self._exclude_path_re = _compile_globs(
+            p.strip("/") for p in self.excludes if "/" in p
+        )
+
+        # Load .gitignore rules if exists
+        self._gitignore_spec = None
+        self._gitignore_re = None
+        self._load_gitignore()
+
+        # Memoized exclusion decision per directory, inherited by descendants
+        self._root_str = str(self.root_dir)
+        self._root_prefix = os.path.join(self._root_str, "")
+        self._dir_decision: Dict[str, bool] = {self._root_str: False}
+
+    def _load_gitignore(self):
+        """Compile the rules of the root .gitignore file if it exists."""
         gitignore_path = self.root_dir / ".gitignore"
         if not gitignore_path.exists():
-            return []
+            return
 
-        patterns = []
-        with open(gitignore_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    patterns.append(line)
-        return patterns
+        with open(gitignore_path, "rb") as f:
+            lines = [line.decode("utf-8", "replace") for line in f.read().splitlines()]
 
-    def _should_exclude(self, path: Path) -> bool:
-        """Check if a path should be excluded based on patterns."""
-        # Check against default excludes
-        for pattern in self.excludes:
-            if fnmatch.fnmatch(path.name, pattern):
-                return True
-            if pattern in str(path):
-                return True
-
-        # Check against .gitignore patterns
-        for pattern in self.gitignore_patterns:
-            if fnmatch.fnmatch(str(path), pattern):
-                return True
+        if pathspec is not None:
+            # pathspec handles comments, escapes and trailing spaces itself
+            self._gitignore_spec = pathspec.GitIgnoreSpec.from_lines(lines)
+            return
 
+        patterns = []
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith(("#", "!")):
+                patterns.append(line.strip("/"))
+        self._gitignore_re = _compile_globs(patterns)
+
+    def _should_exclude_name(self, name: str) -> bool:
+        """Check if a single file or directory name matches an exclude pattern."""
+        if name in self._exclude_literals:
+            return True
+        return self._exclude_glob_re is not None and bool(
+            self._exclude_glob_re.match(name)
+        )
+
+    def _is_gitignored(self, path: str, is_dir: bool = False) -> bool:
+        """Check if a path matches the .gitignore rules of the root directory."""
+        if not path.startswith(self._root_prefix):
+            return False
+        rel_path = path[len(self._root_prefix) :]
+
+        if self._gitignore_spec is not None:
+            # Directory-only patterns ("dir/") need the trailing slash to match
+            return self._gitignore_spec.match_file(
+                rel_path + "/" if is_dir else rel_path
+            )
+        if self._gitignore_re is not None:
+            return bool(
+                self._gitignore_re.match(rel_path)
+                or self._gitignore_re.match(os.path.basename(rel_path))
+            )
         return False
 
-    def _get_language(self, path: Path) -> str:
-        """Determine the language for syntax highlighting."""
-        ext = path.suffix.lower()
-        return LANGUAGE_MAP.get(ext, "text")
+    def _matches_exclude_path(self, path: str) -> bool:
+        """Check if a path relative to the root matches a "/" exclude pattern."""
+        if self._exclude_path_re is None or not path.startswith(self._root_prefix):
+            return False
+        rel_path = path[len(self._root_prefix) :].replace(os.sep, "/")
+        return bool(self._exclude_path_re.match(rel_path))
+
+    def _matches_excludes(self, path: str, is_dir: bool = False) -> bool:
+        """Check a single path against the patterns, ignoring its parents."""
+        return (
+            self._should_exclude_name(os.path.basename(path))
+            or self._matches_exclude_path(path)
+            or self._is_gitignored(path, is_dir)
+        )
+
+    def _is_dir_excluded(self, dirpath: str) -> bool:
+        """Check if a directory, or any of its parents below the root, is excluded.
+
+        Decisions are memoized per directory so that every path below it inherits
+        the result instead of re-matching all the patterns.
+        """
+        decision = self._dir_decision.get(dirpath)
+        if decision is not None:
+            return decision
+
+        # Collect the unclassified ancestors, then classify them top-down
+        pending = []
+        while decision is None:
+            pending.append(dirpath)
+            parent = os.path.dirname(dirpath)
+            if parent == dirpath or not parent.startswith(self._root_prefix):
+                decision = False
+                break
+            dirpath = parent
+            decision = self._dir_decision.get(dirpath)
+
+        for path in reversed(pending):
+            decision = decision or self._matches_excludes(path, is_dir=True)
+            self._dir_decision[path] = decision
+        return decision
 
-    def _generate_tree(self) -> str:
-        """Generate a directory tree using the 'tree' command if available."""
+    def _should_exclude(self, path: Path) -> bool:
+        """Check if a path should be excluded based on patterns."""
+        path_str = os.fspath(path)
+        if path_str == self._root_str:
+            return False
+        if self._is_dir_excluded(os.path.dirname(path_str)):
+            return True
+        return self._matches_excludes(path_str, is_dir=os.path.isdir(path_str))
+
+    def _scan(self):
+        """Walk the root directory once, pruning excluded directories.
+
+        Yields ``(entry, prefix, is_last)`` for every kept ``os.DirEntry`` in
+        depth-first, name-sorted order, where ``prefix`` and ``is_last`` give its
+        position in the directory tree.
+        """
+        # Explicit stack of (entry, path, prefix, is_last); the root has no entry
+        stack = [(None, self._root_str, "    ", True)]
+        while stack:
+            entry, path, prefix, is_last = stack.pop()
+            if entry is not None:
+                yield entry, prefix, is_last
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                prefix += "    " if is_last else "│   "
+
+            # Get all non-excluded items in directory, sorted by name
+            try:
+                with os.scandir(path) as it:
+                    children = [
+                        child
+                        for child in it
+                        if not (
+                            self._is_dir_excluded(child.path)
+                            if child.is_dir(follow_symlinks=False)
+                            else self._matches_excludes(child.path)
+                        )
+                    ]
+            except OSError as e:
+                # Unreadable directories are listed but treated as empty
+                print(f"Warning: cannot read {path} ({e.strerror})")
+                continue
+            children.sort(key=_BY_NAME)
+
+            # Push children in reverse so they are popped in order
+            for i in range(len(children) - 1, -1, -1):
+                child = children[i]
+                stack.append((child, child.path, prefix, i == len(children) - 1))
+
+    def _get_language(self, name: str) -> str:
+        """Determine the language for syntax highlighting from a file name."""
+        return self._LANG_GET(_suffix(name), "text")
+
+    def _read_text(self, path: Path) -> Optional[str]:
+        """Read a text file, or return None for binary and non UTF-8 files."""
+        try:
+            with open(path, "rb") as f:
+                # Skip binary files without decoding them
+                if _looks_binary(f.read(BINARY_SNIFF_SIZE)):
+                    return None
+                f.seek(0)
+                return io.TextIOWrapper(f, encoding="utf-8").read()
+        except UnicodeDecodeError:
+            # Skip files that are not valid UTF-8
+            return None
+
+    def _cache_path(self) -> Path:
+        """Return the cache database of this root in the user cache directory."""
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        digest = hashlib.sha1(self._root_str.encode("utf-8")).hexdigest()[:16]
+        return Path(cache_home, CACHE_DIR_NAME, f"{digest}.sqlite3")
+
+    def _open_cache(self) -> Optional[sqlite3.Connection]:
+        """Open the persistent content cache of the root directory."""
+        cache_path = self._cache_path()
         try:
-            # Try to use the tree command
-            result = subprocess.run(
-                ["tree", "-a", "-I", "|".join(self.excludes), str(self.root_dir)],
-                capture_output=True,
-                text=True,
-                check=True,
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache = sqlite3.connect(cache_path, check_same_thread=False)
+            cache.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content TEXT)"
             )
-            return result.stdout
-        except (subprocess.SubprocessError, FileNotFoundError):
-            # Fallback to manual tree generation
-            return self._manual_tree_generation()
-
-    def _manual_tree_generation(self) -> str:
-        """Generate a directory tree manually if 'tree' command is not available."""
-        tree = []
-
-        def _walk_dir(path: Path, prefix: str = "", is_last: bool = True):
-            if self._should_exclude(path):
+            cache.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: content cache disabled ({e})")
+            return None
+        return cache
+
+    def _cache_get(self, key: str, st: os.stat_result) -> Tuple[bool, Optional[str]]:
+        """Look up an unchanged file in the cache, returning (found, content).
+
+        A busy or broken cache is closed and treated as a miss, so the run
+        continues with uncached reads.
+        """
+        with self._cache_lock:
+            if self._cache is None:
+                return False, None
+            try:
+                row = self._cache.execute(
+                    "SELECT content FROM files "
+                    "WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (key, st.st_size, st.st_mtime_ns),
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Warning: content cache disabled ({e})")
+                self._cache.close()
+                self._cache = None
+                return False, None
+        if row is None:
+            return False, None
+        return True, row[0]
+
+    def _flush_cache(self):
+        """Write the pending cache rows in one short transaction.
+
+        Called from the writer thread in bounded batches, so neither memory
+        nor the database write lock is held for the whole run. A busy or
+        broken cache is closed and the run continues uncached.
+        """
+        with self._cache_lock:
+            rows = self._cache_pending
+            self._cache_pending = []
+            self._cache_pending_size = 0
+            if self._cache is None or not rows:
                 return
-
-            # Add current directory/file
-            tree.append(f"{prefix}{'└── ' if is_last else '├── '}{path.name}")
-
-            if path.is_dir():
-                # Get all items in directory
-                items = sorted(path.iterdir())
-                # Filter out excluded items
-                items = [item for item in items if not self._should_exclude(item)]
-
-                # Process each item
-                for i, item in enumerate(items):
-                    is_last_item = i == len(items) - 1
-                    new_prefix = prefix + ("    " if is_last else "│   ")
-                    _walk_dir(item, new_prefix, is_last_item)
-
-        _walk_dir(self.root_dir)
-        return "\n".join(tree)
-
-    def _process_file(self, path: Path) -> str:
-        """Process a single file and return its formatted content."""
+            try:
+                with self._cache:  # commits, or rolls back on error
+                    self._cache.executemany(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows
+                    )
+            except sqlite3.Error as e:
+                print(f"Warning: content cache disabled ({e})")
+                self._cache.close()
+                self._cache = None
+
+    def _close_cache(self, visited: Optional[List[Path]] = None):
+        """Write the remaining cache rows and close the cache.
+
+        When ``visited`` is given, rows for files that were not part of this
+        run (deleted or renamed since) are dropped.
+        """
+        self._flush_cache()
+        if self._cache is None:
+            return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            # Skip binary files
-            return ""
+            if visited is not None:
+                with self._cache:
+                    self._cache.execute(
+                        "CREATE TEMP TABLE IF NOT EXISTS visited (path TEXT PRIMARY KEY)"
+                    )
+                    self._cache.executemany(
+                        "INSERT OR IGNORE INTO visited VALUES (?)",
+                        ((str(path),) for path in visited),
+                    )
+                    self._cache.execute(
+                        "DELETE FROM files WHERE path NOT IN (SELECT path FROM visited)"
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning: stale cache entries not removed ({e})")
+        finally:
+            self._cache.close()
+            self._cache = None
+
+    def _process_file(self, path: Path) -> Optional[Tuple[str, str]]:
+        """Process a single file and return its block header and content.
+
+        The content is kept separate from the header so it can be written out
+        without being copied into a formatted string. Returns None for files
+        that are skipped.
+        """
+        # Skip oversized files before reading anything
+        st = path.stat()
+        if self.max_file_size and st.st_size > self.max_file_size:
+            return None
+
+        if not self.use_cache:
+            content = self._read_text(path)
+        else:
+            # Reuse the content of unchanged files from a previous run;
+            # a NULL content records a file that was skipped as binary
+            key = str(path)
+            found, content = self._cache_get(key, st)
+            if not found:
+                content = self._read_text(path)
+                with self._cache_lock:
+                    if self._cache is not None:
+                        self._cache_pending.append(
+                            (key, st.st_size, st.st_mtime_ns, content)
+                        )
+                        self._cache_pending_size += len(content or "")
+
+        if content is None:
+            return None
 
         # Get relative path from root
         rel_path = path.relative_to(self.root_dir)
-        language = self._get_language(path)
-
-        # Format the content
-        return f"**{rel_path}**\n\n```{language}\n{content}\n```\n\n"
+        language = self._get_language(path.name)
+
+        return f"**{rel_path}**\n\n```{language}\n", content
+
+    def _process_files(
+        self, paths: List[Path]
+    ) -> Iterator[Optional[Tuple[str, str]]]:
+        """Process files in order, reading them concurrently when jobs > 1."""
+        if self.jobs <= 1 or len(paths) <= 1:
+            yield from map(self._process_file, paths)
+            return
+
+        # Keep a bounded window of reads in flight, yielded in input order, so
+        # results never pile up in memory when reads outrun the writer
+        window = self.jobs * READ_AHEAD_FACTOR
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            pending = deque()
+            for path in paths:
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(self._process_file, path))
+            while pending:
+                yield pending.popleft().result()
+
+    def _write_files(self, out, paths: List[Path], prune_cache: bool = False):
+        """Write the formatted blocks of the given files to the output stream.
+
+        With ``prune_cache``, ``paths`` is taken as the complete file list of
+        the root and cache rows for any other path are dropped.
+        """
+        if self.use_cache:
+            self._cache = self._open_cache()
+        try:
+            for block in self._process_files(paths):
+                if (
+                    len(self._cache_pending) >= CACHE_FLUSH_ROWS
+                    or self._cache_pending_size >= CACHE_FLUSH_SIZE
+                ):
+                    self._flush_cache()
+                if block is None:  # Skipped file (e.g., binary)
+                    continue
+                header, content = block
+                out.write(header)
+                out.write(content)
+                out.write(FILE_BLOCK_END)
+        finally:
+            self._close_cache(paths if prune_cache else None)
+
+    def _write_index(self, out, tree: List[str], files: List[Path]):
+        """Write the full index document to the output stream."""
+        # Write header
+        out.write("# Codebase Index\n\n")
+
+        # Write directory tree
+        out.write("## Directory Structure\n\n")
+        out.write("```\n")
+        out.write("\n".join(tree))
+        out.write("\n```\n\n")
+
+        # Write file contents
+        out.write("## File Contents\n\n")
+
+        # Process all files; this is the full file list of the root
+        self._write_files(out, files, prune_cache=True)
 
     def index(self):
         """Create the codebase index."""
         print(f"Indexing codebase in {self.root_dir}...")
 
-        # Create output file
-        with open(self.output_file, "w", encoding="utf-8") as f:
-            # Write header
-            f.write("# Codebase Index\n\n")
-
-            # Write directory tree
-            f.write("## Directory Structure\n\n")
-            f.write("```\n")
-            f.write(self._generate_tree())
-            f.write("\n```\n\n")
-
-            # Write file contents
-            f.write("## File Contents\n\n")
-
-            # Process all files
-            for path in self.root_dir.rglob("*"):
-                if path.is_file() and not self._should_exclude(path):
-                    content = self._process_file(path)
-                    if content:  # Skip empty content (e.g., binary files)
-                        f.write(content)
+        # Build the directory tree and collect files in a single walk,
+        # estimating the output size from the files that will be embedded
+        tree = [f"└── {self.root_dir.name}"]
+        files = []
+        total_size = 0
+        output_path = str(self.output_file)
+        for entry, prefix, is_last in self._scan():
+            tree.append(f"{prefix}{'└── ' if is_last else '├── '}{entry.name}")
+            # Cheap extension check first, files of unknown type are not opened
+            if (
+                (self.include_unknown or _suffix(entry.name) in _INTERESTING_SUFFIXES)
+                and entry.is_file()
+                and entry.path != output_path  # never embed a previous index
+            ):
+                files.append(Path(entry.path))
+                size = entry.stat().st_size
+                if not self.max_file_size or size <= self.max_file_size:
+                    total_size += size
+
+        if total_size < IN_MEMORY_OUTPUT_LIMIT:
+            # Small enough to build in memory and write with a single call
+            buf = io.StringIO()
+            self._write_index(buf, tree, files)
+            self.output_file.write_text(buf.getvalue(), encoding="utf-8")
+        else:
+            # Stream large indexes through the output buffer
+            with open(
+                self.output_file, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE
+            ) as f:
+                self._write_index(f, tree, files)
 
         print(f"Index created successfully at {self.output_file}")
 
@@ -282,7 +683,35 @@ def main():
         "-e",
         "--exclude",
         action="append",
-        help="Additional patterns to exclude (can be used multiple times)",
+        help=(
+            "Additional patterns to exclude (can be used multiple times). Patterns "
+            "are matched against each file or directory name; patterns containing "
+            "'/' are matched against the path relative to root_dir, e.g. "
+            "'static/lib' or '*/static/lib'"
+        ),
+    )
+    parser.add_argument(
+        "--max-file-size",
+        type=int,
+        default=DEFAULT_MAX_FILE_SIZE,
+        help=f"Skip files larger than this many bytes, 0 to disable (default: {DEFAULT_MAX_FILE_SIZE})",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Number of files to read concurrently, 1 to disable threading (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--include-unknown",
+        action="store_true",
+        help="Also embed files whose extension has no known language, as plain text",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not read or update the content cache in ~/.cache/{CACHE_DIR_NAME}/",
     )
     parser.add_argument(
         "--simple-list",
@@ -298,7 +727,15 @@ def main():
     args = parser.parse_args()
 
     excludes = set(args.exclude) if args.exclude else None
-    indexer = CodebaseIndexer(args.root_dir, args.output, excludes)
+    indexer = CodebaseIndexer(
+        args.root_dir,
+        args.output,
+        excludes,
+        max_file_size=args.max_file_size,
+        jobs=args.jobs,
+        include_unknown=args.include_unknown,
+        use_cache=not args.no_cache,
+    )
 
     # If input-list is provided, read the list of paths
     input_paths = None
@@ -315,24 +752,26 @@ def main():
                     if path.exists() and not indexer._should_exclude(path):
                         f.write(rel_path + "\n")
             else:
-                for path in sorted(indexer.root_dir.rglob("*")):
-                    if not indexer._should_exclude(path):
-                        rel_path = path.relative_to(indexer.root_dir)
-                        f.write(str(rel_path) + "\n")
+                # The walk already yields entries in sorted path order
+                root_len = len(indexer._root_prefix)
+                for entry, _prefix, _is_last in indexer._scan():
+                    f.write(entry.path[root_len:] + "\n")
         print(f"Simple list created successfully at {args.output}")
     else:
         # Full index mode
         if input_paths is not None:
             print(f"Indexing codebase in {indexer.root_dir} using input list...")
-            with open(args.output, "w", encoding="utf-8") as f:
+            with open(
+                args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE
+            ) as f:
                 f.write("# Codebase Index\n\n")
                 f.write("## File Contents\n\n")
+                paths = []
                 for rel_path in input_paths:
                     path = indexer.root_dir / rel_path
                     if path.is_file() and not indexer._should_exclude(path):
-                        content = indexer._process_file(path)
-                        if content:
-                            f.write(content)
+                        paths.append(path)
+                indexer._write_files(f, paths)
             print(f"Index created successfully at {args.output}")
         else:
             indexer.index()
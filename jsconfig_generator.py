@@ -1,13 +1,15 @@
+import argparse
 import os
 import json
-import sys
+from concurrent.futures import ThreadPoolExecutor
 
 """
 Usage:
-    python3 jsconfig_generator.py [extra_addons_dir1] [extra_addons_dir2] ...
+    python3 jsconfig_generator.py [--compact] [extra_addons_dir1] [extra_addons_dir2] ...
 
 - Always includes community/addons and enterprise as permanent roots.
 - Any additional directories passed as arguments will be scanned for modules with static/src, and aliases will be added for those as well.
+- --compact writes the JSON without indentation (smaller file, e.g. for CI).
 """
 
 COMMUNITY_ADDONS_DIR = os.path.abspath(
@@ -19,54 +21,104 @@ ENTERPRISE_ADDONS_DIR = os.path.abspath(
 JSCONFIG_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "../jsconfig.json")
 )
+JSCONFIG_DIR = os.path.dirname(JSCONFIG_PATH)
+PROBE_WORKERS = 32
 
-aliases = {}
+parser = argparse.ArgumentParser(
+    description="Generate jsconfig.json path aliases for Odoo addons"
+)
+parser.add_argument(
+    "extra_dirs",
+    nargs="*",
+    help="Extra addon roots to scan for modules with static/src",
+)
+parser.add_argument(
+    "--compact",
+    action="store_true",
+    help="Write the JSON without indentation",
+)
+args = parser.parse_args()
+
+# (module, static_src, alias target) for every module directory found
+candidates = []
 
 # Scan community addons
-for module in os.listdir(COMMUNITY_ADDONS_DIR):
-    module_path = os.path.join(COMMUNITY_ADDONS_DIR, module)
-    static_src = os.path.join(module_path, "static", "src")
-    if os.path.isdir(static_src):
-        aliases[f"@{module}/*"] = [f"community/addons/{module}/static/src/*"]
+with os.scandir(COMMUNITY_ADDONS_DIR) as it:
+    for entry in it:
+        # Plain files are rejected from the cached directory entry
+        if not entry.is_dir():
+            continue
+        candidates.append(
+            (
+                entry.name,
+                os.path.join(entry.path, "static", "src"),
+                f"community/addons/{entry.name}/static/src/*",
+            )
+        )
 
 # Scan enterprise addons
-for module in os.listdir(ENTERPRISE_ADDONS_DIR):
-    module_path = os.path.join(ENTERPRISE_ADDONS_DIR, module)
-    static_src = os.path.join(module_path, "static", "src")
-    if os.path.isdir(static_src):
-        aliases[f"@{module}/*"] = [f"enterprise/{module}/static/src/*"]
+with os.scandir(ENTERPRISE_ADDONS_DIR) as it:
+    for entry in it:
+        if not entry.is_dir():
+            continue
+        candidates.append(
+            (
+                entry.name,
+                os.path.join(entry.path, "static", "src"),
+                f"enterprise/{entry.name}/static/src/*",
+            )
+        )
 
 # Scan any extra addon roots passed as arguments
-for extra_dir in sys.argv[1:]:
+for extra_dir in args.extra_dirs:
     extra_dir = os.path.abspath(extra_dir)
     if not os.path.isdir(extra_dir):
         print(f"Warning: {extra_dir} is not a directory, skipping.")
         continue
-    for module in os.listdir(extra_dir):
-        module_path = os.path.join(extra_dir, module)
-        static_src = os.path.join(module_path, "static", "src")
-        if os.path.isdir(static_src):
-            # Use the relative path for VS Code
-            rel_path = os.path.relpath(
-                static_src, os.path.dirname(JSCONFIG_PATH)
-            ).replace("static/src", "static/src/*")
-            aliases[f"@{module}/*"] = [
-                f"{os.path.relpath(module_path, os.path.dirname(JSCONFIG_PATH))}/static/src/*"
-            ]
+    # Use the relative path for VS Code
+    rel_root = os.path.relpath(extra_dir, JSCONFIG_DIR)
+    with os.scandir(extra_dir) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            candidates.append(
+                (
+                    entry.name,
+                    os.path.join(entry.path, "static", "src"),
+                    f"{rel_root}/{entry.name}/static/src/*",
+                )
+            )
+
+# Probe static/src concurrently, the stat calls dominate on cold caches.
+# Results come back in scan order, so later roots still override earlier ones.
+aliases = {}
+with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+    found = executor.map(os.path.isdir, [c[1] for c in candidates])
+    for (module, _static_src, target), has_static_src in zip(candidates, found):
+        if has_static_src:
+            aliases[f"@{module}/*"] = [target]
 
 jsconfig = {
     "compilerOptions": {"baseUrl": ".", "paths": aliases},
     "include": ["community/addons/**/*", "enterprise/**/*"]
     + [
-        os.path.join(os.path.relpath(arg, os.path.dirname(JSCONFIG_PATH)), "**/*")
-        for arg in sys.argv[1:]
+        os.path.join(os.path.relpath(arg, JSCONFIG_DIR), "**/*")
+        for arg in args.extra_dirs
     ],
     "exclude": ["node_modules"],
 }
 
-with open(JSCONFIG_PATH, "w") as f:
-    json.dump(jsconfig, f, indent=2)
+if args.compact:
+    data = json.dumps(jsconfig, separators=(",", ":"))
+else:
+    data = json.dumps(jsconfig, indent=2)
+
+# Write to a temporary file and swap it in, so editors never see a partial file
+tmp_path = JSCONFIG_PATH + ".tmp"
+with open(tmp_path, "w", buffering=1 << 20) as f:
+    f.write(data)
+os.replace(tmp_path, JSCONFIG_PATH)
 
 print(
-    f"jsconfig.json generated with {len(aliases)} aliases (community + enterprise + {len(sys.argv[1:])} custom roots)."
+    f"jsconfig.json generated with {len(aliases)} aliases (community + enterprise + {len(args.extra_dirs)} custom roots)."
 )